@@ -1,18 +1,43 @@
 from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel, Field
-from typing import Dict, Optional
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+from typing import Dict, List, Optional
 import mlflow
+import mlflow.artifacts
 import mlflow.pyfunc
 import time
 import logging
-from datetime import datetime
+import warnings
+import asyncio
+import threading
+import itertools
+import hashlib
+import operator
+import shutil
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
+from pathlib import Path
 
 import numpy as np
+import orjson
 import pandas as pd
 
+# Optional: ONNX Runtime serving for sklearn models
+try:
+    import onnxruntime as ort
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    ort = None
+
 # Prometheus metrics
 from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import HistogramMetricFamily, REGISTRY
+from prometheus_client.samples import Sample
+from prometheus_client.utils import floatToGoString
 from starlette.responses import Response
 
 # ============================================
@@ -22,6 +47,16 @@ from starlette.responses import Response
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
 MODEL_NAME = os.getenv("MODEL_NAME", "credit_card_fraud_model")
 MODEL_STAGE = os.getenv("MODEL_STAGE", "Production")  # Production, Staging, None/""
+MODEL_CACHE_DIR = Path(os.getenv("MODEL_CACHE_DIR", "/tmp/model_cache"))  # downloaded versions
+USE_ONNX = os.getenv("USE_ONNX", "true").lower() in ("1", "true", "yes")
+
+# Request schema: one typed field per model input column
+FEATURE_NAMES = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount"]
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "8192"))  # 0 disables
+PREDICT_MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "64"))
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", str(min(4, os.cpu_count() or 1))))
+REQUEST_LOG_SAMPLE_RATE = max(1, int(os.getenv("REQUEST_LOG_SAMPLE_RATE", "100")))  # log 1 in N requests
 
 # Setup logging
 logging.basicConfig(
@@ -30,6 +65,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# The raw estimator is fed a bare ndarray; the feature-name check is done once at load time
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
 # ============================================
 # PROMETHEUS METRICS
 # ============================================
@@ -80,26 +118,113 @@ PREDICTION_VALUE = Histogram(
     buckets=[0.0, 0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0],
 )
 
+PREDICTION_BATCH_SIZE = Histogram(
+    "model_prediction_batch_size",
+    "Number of requests scored per model call",
+    ["model_name"],
+    buckets=[1, 2, 4, 8, 16, 32, 64, 128],
+)
+
+PREDICTION_CACHE_HITS = Counter(
+    "model_prediction_cache_hits_total",
+    "Predictions served from the in-process cache",
+    ["model_name"],
+)
+
 PREDICTION_ERRORS = Counter(
     "model_prediction_errors_total",
     "Total prediction errors",
     ["model_name", "error_type"],
 )
 
-FEATURE_VALUE = Histogram(
+class FeatureHistogram:
+    """Per-feature histogram kept as NumPy bucket counts, exported at scrape time.
+
+    Replaces one Histogram.observe() per feature per request with a single
+    vectorized update per batch of rows. Exposed with the same name, labels
+    and buckets as a regular prometheus_client Histogram.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: List[float]):
+        self.name = name
+        self.documentation = documentation
+        # Upper bounds including the implicit +Inf bucket
+        self._upper_bounds = np.array(list(buckets) + [float("inf")])
+        self._le = [floatToGoString(b) for b in self._upper_bounds]
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._counts = np.zeros((0, len(self._upper_bounds)), dtype=np.int64)
+        self._sums = np.zeros(0, dtype=np.float64)
+
+    def columns(self, feature_names: List[str]) -> np.ndarray:
+        """Row index of each feature, registering unseen names"""
+        with self._lock:
+            new = [n for n in feature_names if n not in self._index]
+            if new:
+                for n in new:
+                    self._index[n] = len(self._names)
+                    self._names.append(n)
+                self._counts = np.vstack(
+                    [self._counts, np.zeros((len(new), self._counts.shape[1]), dtype=np.int64)]
+                )
+                self._sums = np.concatenate([self._sums, np.zeros(len(new))])
+            return np.array([self._index[n] for n in feature_names], dtype=np.intp)
+
+    def observe(self, values: np.ndarray, columns: np.ndarray):
+        """Observe a (rows, features) block; columns[j] is the index of feature j"""
+        n_buckets = len(self._upper_bounds)
+        # Same bucket choice as Histogram.observe (bisect_left on upper bounds)
+        idx = np.minimum(np.searchsorted(self._upper_bounds, values, side="left"), n_buckets - 1)
+        flat = (columns * n_buckets + idx).ravel()
+        with self._lock:
+            size = self._counts.size
+            self._counts += np.bincount(flat, minlength=size).reshape(self._counts.shape)
+            self._sums[columns] += values.sum(axis=0)
+
+    def collect(self):
+        with self._lock:
+            names = list(self._names)
+            cumulative = np.cumsum(self._counts, axis=1)
+            sums = self._sums.copy()
+        # Like Histogram, _sum is only exposed when no bucket bound is negative
+        with_sum = self._upper_bounds[0] >= 0
+        family = HistogramMetricFamily(self.name, self.documentation, labels=["feature_name"])
+        for i, fname in enumerate(names):
+            buckets = list(zip(self._le, cumulative[i].astype(np.float64).tolist()))
+            family.add_metric(
+                [fname],
+                buckets=buckets,
+                sum_value=float(sums[i]) if with_sum else None,
+            )
+            if not with_sum:
+                family.samples.append(
+                    Sample(self.name + "_count", {"feature_name": fname}, buckets[-1][1], None, None)
+                )
+        yield family
+
+
+FEATURE_VALUE = FeatureHistogram(
     "model_feature_value",
     "Distribution of feature values",
-    ["feature_name"],
     buckets=np.linspace(-5, 5, 41).tolist(),
 )
+REGISTRY.register(FEATURE_VALUE)
 
 # ============================================
 # PYDANTIC MODELS
 # ============================================
 
+CreditCardFeatures = create_model(
+    "CreditCardFeatures",
+    __config__=ConfigDict(extra="forbid"),
+    **{name: (float, ...) for name in FEATURE_NAMES},
+)
+
+
 class PredictionRequest(BaseModel):
     """Request model for prediction (Credit Card Fraud)"""
-    features: Dict[str, float] = Field(..., description="Feature dict (column -> value)")
+    features: CreditCardFeatures = Field(..., description="Feature values (column -> value)")
 
     class Config:
         json_schema_extra = {
@@ -140,6 +265,22 @@ class PredictionRequest(BaseModel):
         }
 
 
+def _openapi_body(model: type[BaseModel]) -> dict:
+    """OpenAPI request body for routes that parse the raw body themselves"""
+    schema = model.model_json_schema(ref_template="{model}")
+    defs = schema.pop("$defs", {})
+    for prop in schema["properties"].values():
+        ref = prop.pop("$ref", None) or (prop.pop("allOf", None) or [{}])[0].get("$ref")
+        if ref:
+            prop.update(defs[ref])
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}},
+        }
+    }
+
+
 class PredictionResponse(BaseModel):
     prediction: float
     model_name: str
@@ -160,6 +301,29 @@ class HealthResponse(BaseModel):
 # MODEL MANAGER
 # ============================================
 
+class FastPath:
+    """Batched scoring state for one loaded model.
+
+    Built completely before it is published on the manager and replaced as a
+    whole on reload, so in-flight batches keep the predictor, feature order
+    and prediction cache they started with.
+    """
+
+    def __init__(self, backend: str, predict_fn, feature_order: List[str]):
+        self.backend = backend
+        self.predict = predict_fn
+        self.feature_order = feature_order
+        self.n_features = len(feature_order)
+        # attrgetter pulls every feature in column order in a single C call
+        getter = operator.attrgetter(*feature_order)
+        self.gather = getter if self.n_features > 1 else (lambda d: (getter(d),))
+        self.feature_columns = FEATURE_VALUE.columns(feature_order)
+
+        # LRU cache: ordered feature tuple -> prediction
+        self.cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self.cache_lock = threading.Lock()
+
+
 class ModelManager:
     """Manage ML model from MLFlow Registry"""
 
@@ -170,7 +334,21 @@ class ModelManager:
         self.model_uri = None
         self.load_time = None
 
+        # Fast path: raw estimator + reusable input buffer (see _build_fast_path)
+        self._fast: Optional[FastPath] = None
+        self._row_proba = None  # pyfunc path for binary classifiers, see _row_proba_fn
+        self._local = threading.local()  # per-thread input buffer, see _buffer()
+
+        # Prometheus label children, resolved once per model load (_bind_metrics);
+        # unset until then so no model_version="None" series gets exported
+        self._pred_count_child = None
+        self._pred_latency_child = None
+        self._pred_value_child = None
+        self._batch_size_child = None
+        self._cache_hits_child = None
+
         mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+        self._mlflow_client = mlflow.tracking.MlflowClient()
         logger.info(f"MLFlow tracking URI: {MLFLOW_TRACKING_URI}")
 
     def load_model(self) -> bool:
@@ -186,15 +364,36 @@ class ModelManager:
                 self.model_uri = f"models:/{self.model_name}/latest"
                 logger.info(f"Loading model: {self.model_name} (Latest)")
 
-            self.model = mlflow.pyfunc.load_model(self.model_uri)
-
-            client = mlflow.tracking.MlflowClient()
+            # Resolve the version first so the artifacts can be cached per version
             if stage:
-                versions = client.get_latest_versions(self.model_name, stages=[stage])
+                versions = self._mlflow_client.get_latest_versions(self.model_name, stages=[stage])
             else:
-                versions = client.get_latest_versions(self.model_name)
+                versions = self._mlflow_client.get_latest_versions(self.model_name)
 
-            self.model_version = versions[0].version if versions else "unknown"
+            if versions:
+                latest = max(versions, key=lambda v: int(v.version))
+                version = latest.version
+                model = mlflow.pyfunc.load_model(self._local_model_path(latest))
+            else:
+                version = "unknown"
+                model = mlflow.pyfunc.load_model(self.model_uri)
+
+            # Requests carry exactly FEATURE_NAMES (extra="forbid"): a model that
+            # needs any other column could never be served
+            schema = model.metadata.get_input_schema()
+            if schema is not None and schema.has_input_names():
+                unknown = set(schema.input_names()) - set(FEATURE_NAMES)
+                if unknown:
+                    raise ValueError(f"Model inputs not in request schema: {sorted(unknown)}")
+
+            fast = self._build_fast_path(model)
+            row_proba = self._row_proba_fn(model) if fast is None else None
+
+            # Publish everything at once; requests already in flight finish on
+            # the FastPath (and cache) they looked up
+            self.model, self.model_version, self._fast = model, version, fast
+            self._row_proba = row_proba
+            self._bind_metrics()
 
             self.load_time = time.time() - start_time
 
@@ -209,6 +408,7 @@ class ModelManager:
             logger.info(f"  Model: {self.model_name}")
             logger.info(f"  Version: {self.model_version}")
             logger.info(f"  Load time: {self.load_time:.2f}s")
+            logger.info(f"  Backend: {fast.backend if fast else 'pyfunc'}")
             return True
 
         except Exception as e:
@@ -219,30 +419,371 @@ class ModelManager:
             ).inc()
             return False
 
-    def predict(self, features: Dict[str, float]) -> tuple[float, float]:
-        """Make prediction (MLflow schema-safe: DataFrame with named columns)"""
+    def _local_model_path(self, model_version) -> str:
+        """Local copy of a registered model version, downloaded on first use.
+
+        Cached per version *and* run: a reset registry can hand out the same
+        version number for a different model.
+        """
+        version = model_version.version
+        origin = model_version.run_id or hashlib.sha1(
+            str(model_version.source).encode()
+        ).hexdigest()[:16]
+        path = MODEL_CACHE_DIR / self.model_name / f"{version}-{origin}"
+        if (path / "MLmodel").exists():
+            logger.info(f"  Using cached artifacts: {path}")
+            return str(path)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=path.parent)
+        try:
+            local = mlflow.artifacts.download_artifacts(
+                artifact_uri=f"models:/{self.model_name}/{version}",
+                dst_path=tmp_dir,
+            )
+            try:
+                os.replace(local, path)
+            except OSError:
+                # Another worker (or replica on a shared volume) got there first
+                if not (path / "MLmodel").exists():
+                    raise
+                logger.info(f"  Using artifacts cached concurrently: {path}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return str(path)
+
+    def _bind_metrics(self):
+        """Resolve the per-model metric children so the hot path skips .labels()"""
+        name = self.model_name
+        self._pred_count_child = PREDICTION_COUNT.labels(
+            model_name=name,
+            model_version=str(self.model_version),
+        )
+        self._pred_latency_child = PREDICTION_LATENCY.labels(model_name=name)
+        self._pred_value_child = PREDICTION_VALUE.labels(model_name=name)
+        self._batch_size_child = PREDICTION_BATCH_SIZE.labels(model_name=name)
+        self._cache_hits_child = PREDICTION_CACHE_HITS.labels(model_name=name)
+
+    def _build_fast_path(self, model) -> Optional[FastPath]:
+        """Set up the batched path for model: feature order, gatherer and predict function.
+
+        Models whose flavor cannot be unwrapped are batched through pyfunc on
+        the input buffer; models without a named input signature, or with
+        more than one output per row, use the per-request pyfunc path
+        (returns None).
+        """
+        schema = model.metadata.get_input_schema()
+        if schema is None or not schema.has_input_names():
+            logger.warning("Model has no named input signature, using pyfunc path")
+            return None
+
+        order = list(schema.input_names())
+
+        predict_fn = self._unwrap_predict_fn(model, order)
+        backend = "raw"
+        if predict_fn is None:
+            # Flavor cannot be unwrapped: keep batching, but go through pyfunc on a
+            # DataFrame that wraps the input buffer without copying it
+            logger.warning("Cannot unwrap model flavor, using pyfunc on the input buffer")
+            predict_fn = lambda X: model.predict(pd.DataFrame(X, columns=order, copy=False))
+            backend = "pyfunc-buffer"
+
+        if USE_ONNX and ort is not None:
+            onnx_fn = self._onnx_predict_fn(model, len(order))
+            if onnx_fn is not None:
+                predict_fn = onnx_fn
+                backend = "onnx"
+
+        # Warm up so the first requests do not pay lazy init / graph setup
+        warmup = np.zeros((1, len(order)), dtype=np.float32)
+        for _ in range(10):
+            out = np.asarray(predict_fn(warmup))
+
+        # One value per row only (e.g. not multiclass probability matrices)
+        if out.ndim > 1 and out.shape[1] != 1:
+            logger.warning(f"Model returns {out.shape[1]} outputs per row, using pyfunc path")
+            return None
+
+        return FastPath(backend, predict_fn, order)
+
+    @staticmethod
+    def _raw_estimator(model):
+        """The estimator wrapped by a pyfunc model, for flavors we can unwrap"""
+        flavors = model.metadata.flavors
+        impl = getattr(model, "_model_impl", None)
+        for flavor, attr in (("xgboost", "xgb_model"), ("lightgbm", "lgb_model"), ("sklearn", "sklearn_model")):
+            if flavor in flavors:
+                raw = getattr(impl, attr, None)
+                # Batches are small and already run on PREDICT_WORKERS threads:
+                # a pickled n_jobs=-1 would spawn a pool per predict call
+                if hasattr(raw, "get_params") and "n_jobs" in raw.get_params(deep=False):
+                    raw.set_params(n_jobs=1)
+                return raw
+        return None
+
+    @staticmethod
+    def _binary_proba_fn(raw):
+        """Positive-class probability of a binary sklearn-API classifier, else None"""
+        if hasattr(raw, "predict_proba") and len(getattr(raw, "classes_", ())) == 2:
+            return lambda X: raw.predict_proba(X)[:, 1]
+        return None
+
+    def _unwrap_predict_fn(self, model, order: List[str]):
+        """Return a predict callable on the raw estimator, dispatched on the MLflow flavor.
+
+        Binary classifiers return the positive-class probability, on every
+        backend. Other models return what their own predict returns (label or
+        value), like pyfunc does.
+        """
+        raw = self._raw_estimator(model)
+        if raw is None:
+            return None
+
+        proba = self._binary_proba_fn(raw)
+        if proba is not None:
+            return proba
+
+        if "xgboost" in model.metadata.flavors and not hasattr(raw, "get_booster"):
+            # Native booster: pyfunc returns booster.predict output as-is
+            if hasattr(raw, "inplace_predict"):
+                # inplace_predict skips DMatrix construction
+                return raw.inplace_predict
+            import xgboost as xgb
+
+            return lambda X: raw.predict(xgb.DMatrix(X, feature_names=order, nthread=1))
+
+        if hasattr(raw, "predict"):
+            return raw.predict
+        return None
+
+    def _row_proba_fn(self, model):
+        """Positive-class probability on a request DataFrame, for the pyfunc path.
+
+        pyfunc predict returns the class label; binary classifiers fitted on
+        named columns are scored on the raw estimator instead. None otherwise.
+        """
+        raw = self._raw_estimator(model)
+        proba = self._binary_proba_fn(raw)
+        names = getattr(raw, "feature_names_in_", None)
+        if proba is None or names is None:
+            return None
+        if not set(names) <= set(FEATURE_NAMES):
+            return None
+        columns = list(names)
+        return lambda df: proba(df[columns])
+
+    def _onnx_predict_fn(self, model, n_features: int):
+        """Compile a binary sklearn classifier to ONNX Runtime, or None if not convertible"""
+        if "sklearn" not in model.metadata.flavors:
+            return None
+        raw = getattr(getattr(model, "_model_impl", None), "sklearn_model", None)
+        if not hasattr(raw, "predict_proba") or len(getattr(raw, "classes_", ())) != 2:
+            return None
+
+        try:
+            onx = convert_sklearn(
+                raw,
+                initial_types=[("X", FloatTensorType([None, n_features]))],
+                options={id(raw): {"zipmap": False}},
+            )
+            sess_options = ort.SessionOptions()
+            sess_options.intra_op_num_threads = 1
+            sess = ort.InferenceSession(
+                onx.SerializeToString(),
+                sess_options,
+                providers=["CPUExecutionProvider"],
+            )
+        except Exception as e:
+            logger.warning(f"ONNX conversion failed, using raw estimator: {e}")
+            return None
+
+        # outputs: [label, probabilities (n, 2)]; float32 sums can land just
+        # above 1.0, which predict_proba never returns
+        proba_name = sess.get_outputs()[1].name
+        return lambda X: np.clip(sess.run([proba_name], {"X": X})[0][:, 1], 0.0, 1.0)
+
+    def lookup(self, features: BaseModel) -> tuple[Optional[FastPath], Optional[tuple], Optional[float]]:
+        """Gather features in model column order and check the cache.
+
+        Returns (fast path, key, cached prediction); the fast path is None on
+        the pyfunc path. Pass fast path and key on to predict_batch.
+        """
         if self.model is None:
             raise ValueError("Model not loaded")
-
-        # CRITICAL: keep column names for MLflow schema enforcement
-        df = pd.DataFrame([features])
+        fast = self._fast
+        if fast is None:
+            return None, None, None
+
+        key = fast.gather(features)
+        if PREDICTION_CACHE_SIZE > 0:
+            with fast.cache_lock:
+                cached = fast.cache.get(key)
+                if cached is not None:
+                    fast.cache.move_to_end(key)
+            if cached is not None:
+                self._cache_hits_child.inc()
+                self._record(cached)
+                FEATURE_VALUE.observe(np.array([key]), fast.feature_columns)
+                return fast, key, cached
+        return fast, key, None
+
+    def _buffer(self, n_features: int) -> np.ndarray:
+        """Preallocated (PREDICT_MAX_BATCH, n_features) input buffer of the calling thread"""
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[1] != n_features:
+            buf = self._local.buf = np.empty(
+                (PREDICT_MAX_BATCH, n_features), dtype=np.float32
+            )
+        return buf
+
+    def predict_batch(self, fast: FastPath, keys: List[tuple]) -> tuple[List[float], float]:
+        """Score feature tuples (from lookup on the same fast path) with one model call"""
+        n = len(keys)
+        if n > PREDICT_MAX_BATCH:
+            raise ValueError(f"Batch of {n} exceeds PREDICT_MAX_BATCH={PREDICT_MAX_BATCH}")
 
         start_time = time.time()
-        pred = self.model.predict(df)
+        buf = self._buffer(fast.n_features)[:n]
+        if n == 1:
+            buf[0] = keys[0]
+        else:
+            # Flat fromiter skips numpy's nested-sequence shape discovery
+            buf[:] = np.fromiter(
+                itertools.chain.from_iterable(keys),
+                dtype=np.float32,
+                count=n * fast.n_features,
+            ).reshape(n, fast.n_features)
+        FEATURE_VALUE.observe(buf, fast.feature_columns)
+        # First output column per row (pyfunc may return a 2-D frame)
+        preds = np.asarray(fast.predict(buf), dtype=np.float64).reshape(n, -1)[:, 0].tolist()
         latency = time.time() - start_time
 
-        PREDICTION_COUNT.labels(
-            model_name=self.model_name,
-            model_version=str(self.model_version),
-        ).inc()
+        self._batch_size_child.observe(n)
+        self._pred_count_child.inc(n)
+        observe_latency = self._pred_latency_child.observe
+        observe_value = self._pred_value_child.observe
+        for pred_value in preds:
+            observe_latency(latency)
+            observe_value(pred_value)
+
+        if PREDICTION_CACHE_SIZE > 0:
+            with fast.cache_lock:
+                for key, pred_value in zip(keys, preds):
+                    fast.cache[key] = pred_value
+                while len(fast.cache) > PREDICTION_CACHE_SIZE:
+                    fast.cache.popitem(last=False)
+
+        return preds, latency
+
+    def predict(self, features: BaseModel) -> tuple[float, float]:
+        """Make a single prediction (cache, raw estimator, pyfunc as fallback)"""
+        fast, key, cached = self.lookup(features)
+        if cached is not None:
+            return cached, 0.0
+        if fast is not None:
+            preds, latency = self.predict_batch(fast, [key])
+            return preds[0], latency
 
-        PREDICTION_LATENCY.labels(model_name=self.model_name).observe(latency)
+        # CRITICAL: keep column names for MLflow schema enforcement
+        row = features.model_dump()
+        FEATURE_VALUE.observe(np.array([list(row.values())]), FEATURE_VALUE.columns(list(row)))
+        row_proba = self._row_proba
+        start_time = time.time()
+        if row_proba is not None:
+            pred = row_proba(pd.DataFrame([row]))
+        else:
+            pred = self.model.predict(pd.DataFrame([row]))
+        latency = time.time() - start_time
 
-        pred_value = float(pred[0])
-        PREDICTION_VALUE.labels(model_name=self.model_name).observe(pred_value)
+        self._pred_latency_child.observe(latency)
 
+        pred_value = float(pred[0])
+        self._record(pred_value)
         return pred_value, latency
 
+    def _record(self, pred_value: float):
+        """Count a served prediction and track its value"""
+        self._pred_count_child.inc()
+        self._pred_value_child.observe(pred_value)
+
+
+# ============================================
+# MICRO-BATCHING
+# ============================================
+
+class PredictionBatcher:
+    """Coalesce concurrent /predict requests into one model call.
+
+    Batches are scored on a thread pool so the event loop keeps accepting
+    and parsing requests; up to ``workers`` batches run at once.
+    """
+
+    def __init__(self, manager: ModelManager, max_batch: int,
+                 executor: ThreadPoolExecutor, workers: int):
+        self.manager = manager
+        self.max_batch = max_batch
+        self.executor = executor
+        self.workers = workers
+        self.queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, fast: FastPath, key: tuple) -> float:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fast, key, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Wait for one request, then take whatever else is already queued.
+
+        Called with a worker free, so nothing is gained by waiting for more:
+        batches form from the requests that queue while all workers are busy.
+        """
+        items = [await self.queue.get()]
+        while len(items) < self.max_batch and not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    async def _run(self):
+        while True:
+            # While all workers are busy, requests keep queueing into the next batch
+            await self._slots.acquire()
+            items = await self._collect()
+            task = asyncio.create_task(self._score(items))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _score(self, items: list):
+        loop = asyncio.get_running_loop()
+        try:
+            # A reload between lookup and scoring can mix two models in one batch
+            groups: Dict[FastPath, list] = {}
+            for fast, key, future in items:
+                groups.setdefault(fast, []).append((key, future))
+
+            for fast, group in groups.items():
+                try:
+                    preds, _latency = await loop.run_in_executor(
+                        self.executor, self.manager.predict_batch, fast, [key for key, _ in group]
+                    )
+                except Exception as e:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), pred_value in zip(group, preds):
+                    if not future.done():
+                        future.set_result(pred_value)
+        finally:
+            self._slots.release()
+
 
 # ============================================
 # FASTAPI APP
@@ -252,15 +793,24 @@ app = FastAPI(
     title="ML Model API",
     description="Production ML model serving with monitoring",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 model_manager = ModelManager()
+predict_executor = ThreadPoolExecutor(max_workers=PREDICT_WORKERS, thread_name_prefix="predict")
+batcher = PredictionBatcher(
+    model_manager, PREDICT_MAX_BATCH, predict_executor, PREDICT_WORKERS
+)
 app_start_time = time.time()
 
 # ============================================
 # MIDDLEWARE - REQUEST TRACKING
 # ============================================
 
+# Request log sampling (1 in REQUEST_LOG_SAMPLE_RATE)
+_log_counter = itertools.count()
+
+
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
     start_time = time.time()
@@ -278,10 +828,11 @@ async def track_requests(request: Request, call_next):
         endpoint=request.url.path,
     ).observe(latency)
 
-    logger.info(
-        f"{request.method} {request.url.path} "
-        f"status={response.status_code} latency={latency:.3f}s"
-    )
+    if next(_log_counter) % REQUEST_LOG_SAMPLE_RATE == 0 and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "%s %s status=%s latency=%.3fs",
+            request.method, request.url.path, response.status_code, latency,
+        )
     return response
 
 # ============================================
@@ -292,11 +843,29 @@ async def track_requests(request: Request, call_next):
 async def startup_event():
     logger.info("Starting API server...")
     ok = model_manager.load_model()
+    batcher.start()
     if ok:
         logger.info("API server ready!")
     else:
         logger.error("Failed to load model on startup")
 
+# ============================================
+# HELPERS
+# ============================================
+
+# (formatted "YYYY-MM-DDTHH:MM:SS", epoch second) of the last timestamp
+_ts_cache = ("", -1)
+
+
+def _timestamp() -> str:
+    """Local ISO-8601 timestamp (same format as datetime.now().isoformat())"""
+    global _ts_cache
+    now = time.time()
+    sec = int(now)
+    if sec != _ts_cache[1]:
+        _ts_cache = (time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(sec)), sec)
+    return f"{_ts_cache[0]}.{int((now - sec) * 1e6):06d}"
+
 # ============================================
 # ENDPOINTS
 # ============================================
@@ -327,8 +896,26 @@ async def health_check():
     )
 
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+@app.post(
+    "/predict",
+    response_model=PredictionResponse,
+    openapi_extra=_openapi_body(PredictionRequest),
+)
+async def predict(http_request: Request):
+    # Parse with orjson, then validate; errors keep FastAPI's 422 format
+    body = await http_request.body()
+    try:
+        request = PredictionRequest.model_validate(orjson.loads(body))
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", e.pos), "msg": "JSON decode error",
+              "input": {}, "ctx": {"error": e.msg}}]
+        )
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in e.errors()]
+        )
+
     try:
         if model_manager.model is None:
             PREDICTION_ERRORS.labels(
@@ -337,19 +924,22 @@ async def predict(request: PredictionRequest):
             ).inc()
             raise HTTPException(status_code=503, detail="Model not loaded")
 
-        # Track feature distributions (dict-based)
-        for fname, fvalue in request.features.items():
-            FEATURE_VALUE.labels(feature_name=fname).observe(float(fvalue))
-
         start_time = time.time()
-        prediction, _pred_latency = model_manager.predict(request.features)
+        fast, key, prediction = model_manager.lookup(request.features)
+        if prediction is None:
+            if fast is None:
+                prediction, _pred_latency = await asyncio.get_running_loop().run_in_executor(
+                    predict_executor, model_manager.predict, request.features
+                )
+            else:
+                prediction = await batcher.submit(fast, key)
         total_latency = time.time() - start_time
 
         return PredictionResponse(
             prediction=float(prediction),
             model_name=model_manager.model_name,
             model_version=str(model_manager.model_version),
-            timestamp=datetime.now().isoformat(),
+            timestamp=_timestamp(),
             latency_ms=total_latency * 1000.0,
         )
 
@@ -405,10 +995,16 @@ async def metrics():
 if __name__ == "__main__":
     import uvicorn
 
+    # uvloop + httptools (both shipped with uvicorn[standard]); request logging
+    # is done by track_requests, so uvicorn's access log is disabled
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
         reload=False,
         log_level="info",
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        workers=int(os.getenv("API_WORKERS", "1")),
     )
@@ -10,7 +10,7 @@ This service provides:
 4. Prometheus metrics exposure
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
@@ -18,7 +18,11 @@ import pandas as pd
 import numpy as np
 import logging
 import os
+import time
 import json
+import gzip
+import hashlib
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
@@ -53,6 +57,21 @@ REPORTS_DIR.mkdir(exist_ok=True)
 DATA_DIR.mkdir(exist_ok=True)
 REFERENCE_DIR.mkdir(exist_ok=True)
 
+# Production samples kept in memory (ring buffer capacity)
+PRODUCTION_CAPACITY = 10000
+
+# Dataset drift is flagged when at least this share of features drifted (Evidently default)
+DATASET_DRIFT_SHARE = 0.5
+
+# /drift/fast: full Evidently report every N checks (and whenever drift is found)
+FULL_REPORT_EVERY = 10
+
+# Reports are stored gzipped (fast level: they are mostly base64 plots)
+REPORT_COMPRESS_LEVEL = 1
+
+# Analyses memoized by data content (identical batches reuse scores and report)
+ANALYSIS_CACHE_SIZE = 64
+
 # ============================================
 # PROMETHEUS METRICS
 # ============================================
@@ -137,18 +156,78 @@ class HealthResponse(BaseModel):
 # DATA STORAGE (In-Memory for now)
 # ============================================
 
+def numeric_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Numeric columns of df as sorted float64 arrays with missing values dropped"""
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind not in "iuf":
+            continue
+        values = values.astype(np.float64, copy=False)
+        columns[col] = np.sort(values[~np.isnan(values)])
+    return columns
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (values and column names)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+_KS_TERMS = np.arange(1, 101, dtype=np.float64)
+_KS_SIGNS = np.where(_KS_TERMS % 2 == 1, 2.0, -2.0)
+
+def kolmogorov_sf(x: float) -> float:
+    """Survival function of the Kolmogorov distribution"""
+    if x < 0.2:
+        return 1.0  # series converges slowly here, value is 1 to ~1e-9
+    p = float(np.sum(_KS_SIGNS * np.exp(-2.0 * _KS_TERMS ** 2 * x * x)))
+    return min(1.0, max(0.0, p))
+
+def ks_test(ref_sorted: np.ndarray, curr_sorted: np.ndarray) -> tuple:
+    """Two-sample KS test on sorted samples: (statistic, asymptotic p-value)"""
+    n, m = len(ref_sorted), len(curr_sorted)
+    # Both ECDFs are step functions, so the largest gap is at, or just
+    # before, a point of the current sample: O(m log n) instead of a merge
+    at = np.abs(
+        np.searchsorted(ref_sorted, curr_sorted, side="right") / n
+        - np.searchsorted(curr_sorted, curr_sorted, side="right") / m
+    )
+    before = np.abs(
+        np.searchsorted(ref_sorted, curr_sorted, side="left") / n
+        - np.searchsorted(curr_sorted, curr_sorted, side="left") / m
+    )
+    statistic = float(max(at.max(), before.max()))
+    
+    # Stephens' small-sample correction
+    en = np.sqrt(n * m / (n + m))
+    return statistic, kolmogorov_sf((en + 0.12 + 0.11 / en) * statistic)
+
 class DataStore:
     """Simple in-memory data storage"""
     
     def __init__(self):
         self.reference_data: Optional[pd.DataFrame] = None
-        self.production_data: List[Dict] = []
+        self.reference_columns: Dict[str, np.ndarray] = {}
+        self.reference_digest: Optional[str] = None
         self.last_analysis_time: Optional[datetime] = None
+        self.fast_checks = 0
         self.reference_metadata: Dict = {}
         
+        # Production data: one preallocated ring buffer per column
+        self.capacity = PRODUCTION_CAPACITY
+        self._cols: Dict[str, np.ndarray] = {}
+        self._head = 0
+        self._count = 0
+        
         # Load reference data if exists
         self._load_reference_data()
     
+    @property
+    def production_count(self) -> int:
+        """Number of production samples currently stored"""
+        return self._count
+    
     def _load_reference_data(self):
         """Load reference data from disk if available"""
         reference_file = REFERENCE_DIR / "reference_data.csv"
@@ -157,6 +236,8 @@ class DataStore:
         if reference_file.exists():
             try:
                 self.reference_data = pd.read_csv(reference_file)
+                self.reference_columns = numeric_columns(self.reference_data)
+                self.reference_digest = frame_digest(self.reference_data)
                 logger.info(f"✅ Loaded reference data: {len(self.reference_data)} samples")
                 
                 if metadata_file.exists():
@@ -178,36 +259,78 @@ class DataStore:
                     json.dump(metadata, f, indent=2)
             
             self.reference_data = data
+            self.reference_columns = numeric_columns(data)
+            self.reference_digest = frame_digest(data)
             self.reference_metadata = metadata or {}
             logger.info(f"✅ Saved reference data: {len(data)} samples")
         except Exception as e:
             logger.error(f"❌ Failed to save reference data: {e}")
             raise
     
+    def _new_column(self, value: Any) -> np.ndarray:
+        """Allocate a ring column: float64 for numbers (same dtype as the reference), object otherwise"""
+        if value is None or isinstance(value, (int, float)):
+            return np.full(self.capacity, np.nan, dtype=np.float64)
+        return np.full(self.capacity, None, dtype=object)
+    
     def add_production_data(self, data: Dict):
-        """Add production data point"""
-        self.production_data.append(data)
-        
-        # Keep only last 10000 samples to avoid memory issues
-        if len(self.production_data) > 10000:
-            self.production_data = self.production_data[-10000:]
+        """Add production data point (oldest sample is overwritten when full)"""
+        head = self._head
+        cols = self._cols
+        
+        for key, value in data.items():
+            col = cols.get(key)
+            if col is None:
+                col = cols[key] = self._new_column(value)
+            try:
+                col[head] = np.nan if value is None else value
+            except (TypeError, ValueError):
+                # Non-numeric value in a numeric column
+                col = cols[key] = col.astype(object)
+                col[head] = value
+        
+        # Columns missing from this sample
+        if len(cols) > len(data):
+            for key, col in cols.items():
+                if key not in data:
+                    col[head] = np.nan if col.dtype != object else None
+        
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
     
     def get_production_dataframe(self, window_size: Optional[int] = None) -> pd.DataFrame:
-        """Get production data as DataFrame"""
-        if not self.production_data:
+        """Get the most recent production data (oldest first) as DataFrame"""
+        if self._count == 0:
             return pd.DataFrame()
         
-        data = self.production_data[-window_size:] if window_size else self.production_data
-        return pd.DataFrame(data)
+        n = min(window_size, self._count) if window_size else self._count
+        start = (self._head - n) % self.capacity
+        end = start + n
+        
+        if end <= self.capacity:
+            columns = {key: col[start:end] for key, col in self._cols.items()}
+        else:
+            wrap = end - self.capacity
+            columns = {
+                key: np.concatenate((col[start:], col[:wrap]))
+                for key, col in self._cols.items()
+            }
+        return pd.DataFrame(columns, copy=False)
     
     def clear_production_data(self):
         """Clear production data"""
-        self.production_data = []
+        self._cols = {}
+        self._head = 0
+        self._count = 0
         logger.info("🗑️ Cleared production data")
 
 # Initialize data store
 data_store = DataStore()
 
+def list_report_files() -> List[Path]:
+    """Saved reports: gzipped, plus plain HTML from older versions"""
+    return list(REPORTS_DIR.glob("*.html.gz")) + list(REPORTS_DIR.glob("*.html"))
+
 # ============================================
 # FASTAPI APP
 # ============================================
@@ -236,6 +359,8 @@ async def root():
             "metrics": "/metrics",
             "capture": "/capture (POST)",
             "analyze": "/analyze (POST)",
+            "fast_check": "/drift/fast (POST)",
+            "full_analysis": "/drift/full (POST)",
             "reports": "/reports",
             "reference": "/reference (GET/POST)"
         }
@@ -244,12 +369,12 @@ async def root():
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    reports = list(REPORTS_DIR.glob("*.html"))
+    reports = list_report_files()
     
     return HealthResponse(
         status="healthy",
         reference_data_loaded=data_store.reference_data is not None,
-        production_data_count=len(data_store.production_data),
+        production_data_count=data_store.production_count,
         last_analysis=data_store.last_analysis_time.isoformat() if data_store.last_analysis_time else None,
         reports_count=len(reports)
     )
@@ -275,7 +400,7 @@ async def capture_prediction(data: PredictionData):
         return {
             "status": "success",
             "message": "Data captured successfully",
-            "total_samples": len(data_store.production_data)
+            "total_samples": data_store.production_count
         }
     
     except Exception as e:
@@ -292,13 +417,65 @@ async def capture_batch(data: BatchPredictionData):
         return {
             "status": "success",
             "message": f"Captured {len(data.data)} samples",
-            "total_samples": len(data_store.production_data)
+            "total_samples": data_store.production_count
         }
     
     except Exception as e:
         logger.error(f"Error capturing batch: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def run_analysis(
+    request: DriftAnalysisRequest,
+    background_tasks: BackgroundTasks,
+    full_report: bool = True,
+    include_quality: bool = False
+) -> Dict[str, Any]:
+    """Analyze the latest production window against the reference data"""
+    # Check if reference data is available
+    if data_store.reference_data is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Reference data not loaded. Please upload reference data first."
+        )
+    
+    # Get production data
+    production_df = data_store.get_production_dataframe(request.window_size)
+    
+    if len(production_df) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="No production data available for analysis"
+        )
+    
+    logger.info(f"🔍 Starting drift analysis...")
+    logger.info(f"   Reference samples: {len(data_store.reference_data)}")
+    logger.info(f"   Production samples: {len(production_df)}")
+    
+    # Perform drift analysis
+    start_time = time.time()
+    
+    result = perform_drift_analysis(
+        reference_data=data_store.reference_data,
+        current_data=production_df,
+        reference_columns=data_store.reference_columns,
+        reference_digest=data_store.reference_digest,
+        threshold=request.threshold,
+        background_tasks=background_tasks,
+        full_report=full_report,
+        include_quality=include_quality
+    )
+    
+    duration = time.time() - start_time
+    
+    # Update metrics
+    ANALYSIS_COUNT.inc()
+    ANALYSIS_DURATION.observe(duration)
+    data_store.last_analysis_time = datetime.now()
+    
+    logger.info(f"✅ Analysis completed in {duration:.2f}s")
+    
+    return result
+
 @app.post("/analyze")
 async def analyze_drift(
     request: DriftAnalysisRequest = DriftAnalysisRequest(),
@@ -306,46 +483,7 @@ async def analyze_drift(
 ):
     """Trigger drift analysis"""
     try:
-        # Check if reference data is available
-        if data_store.reference_data is None:
-            raise HTTPException(
-                status_code=400,
-                detail="Reference data not loaded. Please upload reference data first."
-            )
-        
-        # Get production data
-        production_df = data_store.get_production_dataframe(request.window_size)
-        
-        if len(production_df) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="No production data available for analysis"
-            )
-        
-        logger.info(f"🔍 Starting drift analysis...")
-        logger.info(f"   Reference samples: {len(data_store.reference_data)}")
-        logger.info(f"   Production samples: {len(production_df)}")
-        
-        # Perform drift analysis
-        import time
-        start_time = time.time()
-        
-        result = perform_drift_analysis(
-            reference_data=data_store.reference_data,
-            current_data=production_df,
-            threshold=request.threshold
-        )
-        
-        duration = time.time() - start_time
-        
-        # Update metrics
-        ANALYSIS_COUNT.inc()
-        ANALYSIS_DURATION.observe(duration)
-        data_store.last_analysis_time = datetime.now()
-        
-        logger.info(f"✅ Analysis completed in {duration:.2f}s")
-        
-        return result
+        return run_analysis(request, background_tasks)
     
     except HTTPException:
         raise
@@ -353,6 +491,39 @@ async def analyze_drift(
         logger.error(f"❌ Error during drift analysis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/drift/full")
+async def full_drift_analysis(
+    request: DriftAnalysisRequest = DriftAnalysisRequest(),
+    background_tasks: BackgroundTasks = BackgroundTasks()
+):
+    """Drift analysis with a report that also includes data quality metrics"""
+    try:
+        return run_analysis(request, background_tasks, include_quality=True)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error during full drift analysis: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/drift/fast")
+async def fast_drift_check(
+    request: DriftAnalysisRequest = DriftAnalysisRequest(),
+    background_tasks: BackgroundTasks = BackgroundTasks()
+):
+    """Drift check for frequent polling: KS tests only, Evidently report
+    every FULL_REPORT_EVERY checks or when drift is detected"""
+    try:
+        data_store.fast_checks += 1
+        full_report = data_store.fast_checks % FULL_REPORT_EVERY == 0
+        return run_analysis(request, background_tasks, full_report=full_report)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error during fast drift check: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/reference")
 async def get_reference_info():
     """Get reference data information"""
@@ -406,7 +577,7 @@ async def upload_reference_data(request: ReferenceDataRequest):
 @app.get("/reports")
 async def list_reports():
     """List all available reports"""
-    reports = sorted(REPORTS_DIR.glob("*.html"), key=lambda x: x.stat().st_mtime, reverse=True)
+    reports = sorted(list_report_files(), key=lambda x: x.stat().st_mtime, reverse=True)
     
     return {
         "count": len(reports),
@@ -422,14 +593,25 @@ async def list_reports():
     }
 
 @app.get("/reports/{report_name}", response_class=HTMLResponse)
-async def get_report(report_name: str):
+async def get_report(report_name: str, request: Request):
     """Get specific report"""
     report_path = REPORTS_DIR / report_name
     
     if not report_path.exists():
         raise HTTPException(status_code=404, detail="Report not found")
     
-    return report_path.read_text()
+    if report_path.suffix != ".gz":
+        return report_path.read_text()
+    
+    # Gzipped report: send as-is when the client accepts it
+    body = report_path.read_bytes()
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=body,
+            media_type="text/html; charset=utf-8",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+        )
+    return HTMLResponse(gzip.decompress(body).decode("utf-8"))
 
 @app.delete("/production-data")
 async def clear_production_data():
@@ -446,79 +628,146 @@ async def metrics():
 # DRIFT ANALYSIS LOGIC
 # ============================================
 
+# content hash -> {"drift_scores": ..., "report_filename": ..., "quality_report_filename": ...}
+_analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def analysis_key(reference_digest: str, curr_df: pd.DataFrame, feature_cols: List[str]) -> str:
+    """Content hash of the data being compared (reference given by its frame_digest)"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(reference_digest.encode())
+    h.update(pd.util.hash_pandas_object(curr_df, index=False).values.tobytes())
+    h.update(repr(feature_cols).encode())
+    return h.hexdigest()
+
+# Presets are configuration only: each Report.run generates fresh metric
+# objects from them, so one instance can back every report
+DRIFT_PRESET = DataDriftPreset()
+QUALITY_PRESET = DataQualityPreset()
+
+def save_drift_report(ref_df: pd.DataFrame, curr_df: pd.DataFrame, report_path: Path,
+                      cache_key: Optional[str] = None, include_quality: bool = False):
+    """Run the Evidently drift report (plus data quality if asked) and save it as gzipped HTML"""
+    try:
+        presets = [DRIFT_PRESET, QUALITY_PRESET] if include_quality else [DRIFT_PRESET]
+        report = Report(metrics=presets)
+        report.run(reference_data=ref_df, current_data=curr_df)
+        with gzip.open(report_path, "wt", encoding="utf-8", compresslevel=REPORT_COMPRESS_LEVEL) as f:
+            f.write(report.get_html())
+        logger.info(f"📊 Report saved: {report_path.name}")
+    except Exception as e:
+        logger.error(f"Error generating drift report: {e}", exc_info=True)
+        # Don't hand out a report that will never exist
+        if cache_key is not None:
+            _analysis_cache.pop(cache_key, None)
+
 def perform_drift_analysis(
     reference_data: pd.DataFrame,
     current_data: pd.DataFrame,
-    threshold: float = 0.1
+    threshold: float = 0.1,
+    background_tasks: Optional[BackgroundTasks] = None,
+    reference_columns: Optional[Dict[str, np.ndarray]] = None,
+    reference_digest: Optional[str] = None,
+    full_report: bool = True,
+    include_quality: bool = False
 ) -> Dict[str, Any]:
-    """Perform drift analysis using Evidently"""
+    """Perform drift analysis (per-feature two-sample KS test).
+
+    A feature drifts when the KS p-value is below ``threshold``. The full
+    Evidently HTML report is generated in ``background_tasks`` when given,
+    inline otherwise; with ``full_report=False`` only when drift is
+    detected. ``include_quality`` adds Evidently's data quality preset to
+    the report. ``reference_columns`` (see ``numeric_columns``) and
+    ``reference_digest`` (see ``frame_digest``) let callers reuse what was
+    prepared for the reference data at upload time.
+
+    Results are memoized on the content of both frames: repeated calls with
+    the same data reuse the p-values and the already generated report.
+    """
     
     try:
-        # Align columns
-        common_cols = list(set(reference_data.columns) & set(current_data.columns))
+        # Align columns (keeps the reference column order)
+        common_cols = reference_data.columns.intersection(current_data.columns, sort=False)
         
         # Remove non-numeric columns and metadata columns
         exclude_cols = ['prediction', 'timestamp', 'model_version']
-        feature_cols = [col for col in common_cols if col not in exclude_cols]
+        feature_cols = common_cols.difference(exclude_cols, sort=False).tolist()
         
         if not feature_cols:
             raise ValueError("No common features found between reference and current data")
         
-        ref_df = reference_data[feature_cols].copy()
-        curr_df = current_data[feature_cols].copy()
+        # Column selection already yields new frames; Evidently doesn't mutate them
+        ref_df = reference_data[feature_cols]
+        curr_df = current_data[feature_cols]
         
         logger.info(f"   Analyzing {len(feature_cols)} features: {feature_cols}")
         
-        # Create report
-        report = Report(metrics=[
-            DataDriftPreset(),
-            DataQualityPreset()
-        ])
-        
-        # Run report
-        report.run(reference_data=ref_df, current_data=curr_df)
-        
-        # Extract metrics
-        report_dict = report.as_dict()
+        if reference_digest is None:
+            reference_digest = frame_digest(reference_data)
+        cache_key = analysis_key(reference_digest, curr_df, feature_cols)
+        cached = _analysis_cache.get(cache_key)
+        
+        if cached is not None:
+            _analysis_cache.move_to_end(cache_key)
+            drift_scores = cached["drift_scores"]
+            logger.info("   ♻️ Same data as a previous analysis, reusing results")
+        else:
+            if reference_columns is None:
+                reference_columns = numeric_columns(ref_df)
+            current_columns = numeric_columns(curr_df)
+            
+            drift_scores = {}
+            for feature in feature_cols:
+                ref_values = reference_columns.get(feature)
+                curr_values = current_columns.get(feature)
+                if ref_values is None or curr_values is None:
+                    continue
+                if len(ref_values) == 0 or len(curr_values) == 0:
+                    continue
+                
+                _statistic, p_value = ks_test(ref_values, curr_values)
+                drift_scores[feature] = float(p_value)
+            
+            cached = _analysis_cache[cache_key] = {
+                "drift_scores": drift_scores,
+                "report_filename": None,
+                "quality_report_filename": None
+            }
+            while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
         
-        # Parse results
-        drift_detected = False
         drifted_features = []
-        drift_scores = {}
+        for feature, p_value in drift_scores.items():
+            is_drifted = p_value < threshold
+            
+            if is_drifted:
+                drifted_features.append(feature)
+            
+            # Update Prometheus metrics
+            FEATURE_DRIFT.labels(feature_name=feature).set(1 if is_drifted else 0)
         
-        # Extract drift information from metrics
-        for metric in report_dict.get('metrics', []):
-            if metric.get('metric') == 'DatasetDriftMetric':
-                result = metric.get('result', {})
-                drift_detected = result.get('dataset_drift', False)
-                drift_score = result.get('share_of_drifted_columns', 0)
-                
-                # Get per-feature drift
-                drift_by_columns = result.get('drift_by_columns', {})
-                for feature, drift_info in drift_by_columns.items():
-                    is_drifted = drift_info.get('drift_detected', False)
-                    score = drift_info.get('drift_score', 0)
-                    
-                    drift_scores[feature] = score
-                    
-                    if is_drifted:
-                        drifted_features.append(feature)
-                    
-                    # Update Prometheus metrics
-                    FEATURE_DRIFT.labels(feature_name=feature).set(1 if is_drifted else 0)
+        drift_score = len(drifted_features) / len(drift_scores) if drift_scores else 0
+        drift_detected = bool(drift_scores) and drift_score >= DATASET_DRIFT_SHARE
         
         # Update global metrics
         DRIFT_DETECTED.set(1 if drift_detected else 0)
         DRIFT_SCORE.set(drift_score if drift_detected else 0)
         DRIFTED_FEATURES_COUNT.set(len(drifted_features))
         
-        # Save HTML report
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_filename = f"drift_report_{timestamp}.html"
-        report_path = REPORTS_DIR / report_filename
-        report.save_html(str(report_path))
-        
-        logger.info(f"📊 Report saved: {report_filename}")
+        report_slot = "quality_report_filename" if include_quality else "report_filename"
+        report_filename = cached[report_slot]
+        if report_filename is None and (full_report or drift_detected):
+            # Full HTML report (slow) off the request path
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            prefix = "drift_quality_report" if include_quality else "drift_report"
+            report_filename = cached[report_slot] = f"{prefix}_{timestamp}.html.gz"
+            report_path = REPORTS_DIR / report_filename
+            
+            if background_tasks is not None:
+                background_tasks.add_task(
+                    save_drift_report, ref_df, curr_df, report_path, cache_key, include_quality
+                )
+            else:
+                save_drift_report(ref_df, curr_df, report_path, cache_key, include_quality)
         
         # Return summary
         return {
@@ -530,7 +779,7 @@ def perform_drift_analysis(
             "drift_scores": drift_scores,
             "total_features": len(feature_cols),
             "drifted_count": len(drifted_features),
-            "report_url": f"/reports/{report_filename}",
+            "report_url": f"/reports/{report_filename}" if report_filename else None,
             "report_filename": report_filename,
             "reference_samples": len(ref_df),
             "current_samples": len(curr_df)
@@ -7,12 +7,16 @@ MAX_DROP = float(os.getenv("MAX_DROP", 0.02))
 
 client = MlflowClient()
 
-# Get latest STAGING
-staging = client.get_latest_versions(MODEL_NAME, stages=["Staging"])
-if not staging:
+# Latest STAGING and PRODUCTION versions in one request
+latest = {
+    mv.current_stage: mv
+    for mv in client.get_latest_versions(MODEL_NAME, stages=["Staging", "Production"])
+}
+staging = latest.get("Staging")
+if staging is None:
     raise RuntimeError("No STAGING model found")
 
-staging_run = client.get_run(staging[0].run_id)
+staging_run = client.get_run(staging.run_id)
 staging_f1 = staging_run.data.metrics.get("f1")
 
 if staging_f1 is None:
@@ -23,9 +27,9 @@ if staging_f1 < MIN_F1:
     raise SystemExit(f"❌ Gate failed: f1={staging_f1:.4f} < {MIN_F1}")
 
 # Compare with Production (if exists)
-prod = client.get_latest_versions(MODEL_NAME, stages=["Production"])
-if prod:
-    prod_run = client.get_run(prod[0].run_id)
+prod = latest.get("Production")
+if prod is not None:
+    prod_run = client.get_run(prod.run_id)
     prod_f1 = prod_run.data.metrics.get("f1")
     if prod_f1 and staging_f1 < prod_f1 - MAX_DROP:
         raise SystemExit(
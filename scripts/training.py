@@ -1,7 +1,8 @@
+import numpy as np
 import pandas as pd
 import mlflow
 import mlflow.sklearn
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import f1_score
 from mlflow.models.signature import infer_signature
@@ -19,20 +20,34 @@ os.environ["MLFLOW_S3_ENDPOINT_URL"] = "http://minio:9000"
 os.environ["AWS_ACCESS_KEY_ID"] = "minio"
 os.environ["AWS_SECRET_ACCESS_KEY"] = "minio123"
 
+# Column dtypes: float32 features (what the trees train on anyway); the label
+# stays int64 so classes_, predict() and the logged output signature do too
+CSV_DTYPES = {
+    "Time": "float32",
+    **{f"V{i}": "float32" for i in range(1, 29)},
+    "Amount": "float32",
+    "Class": "int64",
+}
+
 # Load data
-df = pd.read_csv("data/creditcard.csv")
+df = pd.read_csv("data/creditcard.csv", engine="pyarrow", dtype=CSV_DTYPES)
 X = df.drop(columns=["Class"])
-y = df["Class"]
+y = df["Class"].to_numpy()
+del df  # X holds its own copy of the features
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42, stratify=y
-)
+# Stratified split on row indices (same split as train_test_split(..., stratify=y))
+splitter = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+train_idx, test_idx = next(splitter.split(np.zeros(len(y)), y))
+X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+y_train, y_test = y[train_idx], y[test_idx]
+del X
 
 # Train
 model = RandomForestClassifier(
     n_estimators=100,
     random_state=42,
-    class_weight="balanced"
+    class_weight="balanced",
+    n_jobs=-1
 )
 model.fit(X_train, y_train)
 
@@ -40,6 +55,10 @@ model.fit(X_train, y_train)
 preds = model.predict(X_test)
 f1 = f1_score(y_test, preds)
 
+# n_jobs=-1 is for training only: the pickled estimator would otherwise fan
+# every serving-time predict out to all cores
+model.set_params(n_jobs=None)
+
 # Log MLflow
 with mlflow.start_run() as run:
     mlflow.log_metric("f1", f1)
@@ -52,19 +71,18 @@ with mlflow.start_run() as run:
         model,
         artifact_path="model",
         registered_model_name=MODEL_NAME,
-        signature=infer_signature(X_train, model.predict(X_train))
+        # A sample is enough to infer input/output types; the inputs are
+        # declared double so float64 clients still pass schema enforcement
+        signature=infer_signature(
+            X_train.iloc[:100].astype("float64"), model.predict(X_train.iloc[:100])
+        )
     )
 
     run_id = run.info.run_id
 
 # Move model to STAGING
 client = MlflowClient()
-versions = client.search_model_versions(f"name='{MODEL_NAME}'")
-latest = sorted(
-    [v for v in versions if v.run_id == run_id],
-    key=lambda x: int(x.version),
-    reverse=True
-)[0]
+latest = client.search_model_versions(f"name='{MODEL_NAME}' and run_id='{run_id}'")[0]
 
 client.transition_model_version_stage(
     name=MODEL_NAME,
@@ -1,7 +1,8 @@
+import numpy as np
 import pandas as pd
 import mlflow
 import mlflow.sklearn
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedShuffleSplit
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report
 from mlflow.models.signature import infer_signature
@@ -13,34 +14,53 @@ os.environ['MLFLOW_S3_ENDPOINT_URL'] = 'http://minio:9000'
 os.environ['AWS_ACCESS_KEY_ID'] = 'minio'
 os.environ['AWS_SECRET_ACCESS_KEY'] = 'minio123'
 
+# Column dtypes: float32 features (what the trees train on anyway); the label
+# stays int64 so classes_, predict() and the logged output signature do too
+CSV_DTYPES = {
+    "Time": "float32",
+    **{f"V{i}": "float32" for i in range(1, 29)},
+    "Amount": "float32",
+    "Class": "int64",
+}
+
 # Load dataset
-df = pd.read_csv("data/creditcard.csv")
+df = pd.read_csv("data/creditcard.csv", engine="pyarrow", dtype=CSV_DTYPES)
 X = df.drop(columns=["Class"])
-y = df["Class"]
+y = df["Class"].to_numpy()
+del df  # X holds its own copy of the features
 
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+# Train/test split on row indices (same split as train_test_split(..., stratify=y))
+splitter = StratifiedShuffleSplit(n_splits=1, test_size=0.2, random_state=42)
+train_idx, test_idx = next(splitter.split(np.zeros(len(y)), y))
+X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+y_train, y_test = y[train_idx], y[test_idx]
+del X
 
 # Train model
-clf = RandomForestClassifier(n_estimators=100, random_state=42, class_weight="balanced")
+clf = RandomForestClassifier(n_estimators=100, random_state=42, class_weight="balanced", n_jobs=-1)
 clf.fit(X_train, y_train)
 
 # Predict & evaluate
 preds = clf.predict(X_test)
 print(classification_report(y_test, preds))
 
+# n_jobs=-1 is for training only: the pickled estimator would otherwise fan
+# every serving-time predict out to all cores
+clf.set_params(n_jobs=None)
+
 # Log to MLFlow
-with mlflow.start_run(run_name="creditcard_rf"):
+with mlflow.start_run(run_name="creditcard_rf") as run:
     mlflow.sklearn.log_model(
         clf,
         artifact_path="model",
         registered_model_name="creditcard_model",
-        signature=infer_signature(X_train, clf.predict(X_train))
+        # Schema stays double so float64 clients pass schema enforcement
+        signature=infer_signature(X_train.iloc[:100].astype("float64"), clf.predict(X_train.iloc[:100]))
     )
     mlflow.log_params({"n_estimators": 100, "class_weight": "balanced"})
 
-# Promote to Production
+# Promote to Production (the version registered by this run, filtered server-side)
 client = mlflow.tracking.MlflowClient()
-versions = client.get_latest_versions("creditcard_model", stages=["None"])
+versions = client.search_model_versions(f"name='creditcard_model' and run_id='{run.info.run_id}'")
 if versions:
     client.transition_model_version_stage("creditcard_model", versions[0].version, stage="Production")
@@ -1,8 +1,46 @@
+import logging
 import numpy as np
 import pandas as pd
+from pathlib import Path
 from typing import Dict, List, Optional
 import yaml
 
+try:
+    from numba import njit
+except ImportError:  # optional: fall back to the NumPy path
+    njit = None
+
+logger = logging.getLogger(__name__)
+
+# Feature kinds for the drift kernel
+KIND_PCA, KIND_AMOUNT, KIND_TIME = 0, 1, 2
+
+if njit is not None:
+
+    @njit(
+        "void(float64[:, :], float64[:], boolean[:, :], int8[:], float64, float64)",
+        cache=True,
+        fastmath=True,
+    )
+    def _drift_kernel(arr, std, mask, kind, drift_multiplier, noise_level):
+        """Drift the masked cells of arr in place, one row at a time"""
+        amount_multiplier = max(drift_multiplier, 2.0)
+        for i in range(arr.shape[0]):
+            for j in range(arr.shape[1]):
+                if not mask[i, j]:
+                    continue
+                base = arr[i, j]
+                sigma = std[j]
+                noise = np.random.normal(0.0, sigma * noise_level)
+                if kind[j] == KIND_AMOUNT:
+                    arr[i, j] = max(0.0, base * amount_multiplier + 1000.0 + noise)
+                elif kind[j] == KIND_TIME:
+                    arr[i, j] = base + 20000.0 + noise
+                else:
+                    arr[i, j] = base * drift_multiplier + drift_multiplier * sigma + noise
+else:
+    _drift_kernel = None
+
 
 class CreditCardDataGenerator:
     def __init__(self, config_path: str = "config.yaml"):
@@ -13,18 +51,133 @@ class CreditCardDataGenerator:
         self.dataset_path = ds["path"]
         self.target_col = ds["target_column"]
         self.feature_columns: List[str] = ds["feature_columns"]
+        self.cache_dir = Path(ds.get("cache_dir", "cache"))
+
+        if not self._load_cache():
+            df = pd.read_csv(self.dataset_path)
+
+            # baseline traffic: normal transactions only
+            df = df[df[self.target_col] == 0]
+            self.df = df[self.feature_columns].reset_index(drop=True)
+
+            self.std = self.df.std(numeric_only=True).replace(0, 1e-6)
+            self._save_cache()
+
+        # NumPy views for batched sampling
+        self._cols = tuple(self.feature_columns)
+        self._values = self.df[list(self._cols)].to_numpy(dtype=np.float64, copy=True)
+        self._std = self.std.reindex(list(self._cols)).fillna(1.0).to_numpy(dtype=np.float64, copy=True)
+        self._is_amount = np.array([c == "Amount" for c in self._cols])
+        self._is_time = np.array([c == "Time" for c in self._cols])
+        self._kind = np.array(
+            [KIND_TIME if c == "Time" else KIND_AMOUNT if c == "Amount" else KIND_PCA for c in self._cols],
+            dtype=np.int8,
+        )
+
+    @property
+    def _cache_files(self):
+        return self.cache_dir / "creditcard_ref.parquet", self.cache_dir / "creditcard_ref_std.npz"
+
+    @property
+    def _cache_source(self) -> str:
+        """What the cache was built from: dataset file and label column"""
+        return f"{Path(self.dataset_path).resolve()}::{self.target_col}"
+
+    def _load_cache(self) -> bool:
+        """Load the filtered baseline frame and std cached by a previous run"""
+        frame_file, std_file = self._cache_files
+        try:
+            source_mtime = Path(self.dataset_path).stat().st_mtime
+            if min(frame_file.stat().st_mtime, std_file.stat().st_mtime) < source_mtime:
+                return False
+
+            df = pd.read_parquet(frame_file)
+            if list(df.columns) != list(self.feature_columns):
+                return False
+            with np.load(std_file, allow_pickle=False) as npz:
+                # Another dataset or label column reuses the same cache_dir
+                if str(npz["source"]) != self._cache_source:
+                    return False
+                std = pd.Series(npz["values"], index=npz["names"].tolist())
+        except Exception:
+            # No (usable) cache, or no parquet engine installed
+            return False
+
+        self.df = df
+        self.std = std
+        logger.info("Loaded baseline data from cache %s", frame_file)
+        return True
+
+    def _save_cache(self):
+        frame_file, std_file = self._cache_files
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.df.to_parquet(frame_file, compression="zstd", index=False)
+            np.savez(
+                std_file,
+                names=np.array(self.std.index, dtype=str),
+                values=self.std.to_numpy(),
+                source=np.array(self._cache_source),
+            )
+        except Exception as e:
+            logger.warning("Could not cache baseline data: %s", e)
 
-        df = pd.read_csv(self.dataset_path)
+    def generate_normal_sample(self) -> Dict[str, float]:
+        row = self.generate_normal_batch(1)[0]
+        return dict(zip(self._cols, row.tolist()))
 
-        # baseline traffic: normal transactions only
-        df = df[df[self.target_col] == 0]
-        self.df = df[self.feature_columns].reset_index(drop=True)
+    def generate_normal_batch(self, n: int) -> np.ndarray:
+        """(n, n_features) array of rows drawn from the baseline data"""
+        return self._values[np.random.randint(0, len(self._values), n)]
 
-        self.std = self.df.std(numeric_only=True).replace(0, 1e-6)
+    def _feature_mask(self, affected_features: List[str]) -> np.ndarray:
+        """Boolean mask over feature columns for one drifted sample"""
+        mask = np.isin(self._cols, affected_features)
+        # Always include Amount drift to make dataset drift detectable
+        mask |= self._is_amount
+        return mask
+
+    def _random_mask(self, n: int, affected_n: int) -> np.ndarray:
+        """(n, n_features) mask with affected_n random features drifted per row"""
+        if affected_n > 0:
+            candidates = ~self._is_time
+        else:
+            # No count given: pick 5 PCA features (exclude Time, Amount by default)
+            candidates = ~(self._is_time | self._is_amount)
+            affected_n = 5
+        k = min(affected_n, int(candidates.sum()))
+
+        mask = np.zeros((n, len(self._cols)), dtype=bool)
+        if k > 0:
+            # k smallest of per-row uniform keys = k features drawn without replacement
+            keys = np.random.random_sample(mask.shape)
+            keys[:, ~candidates] = np.inf
+            idx = np.argpartition(keys, k - 1, axis=1)[:, :k]
+            np.put_along_axis(mask, idx, True, axis=1)
 
-    def generate_normal_sample(self) -> Dict[str, float]:
-        row = self.df.sample(1).iloc[0]
-        return {c: float(row[c]) for c in self.feature_columns}
+        # Always include Amount drift to make dataset drift detectable
+        mask |= self._is_amount
+        return mask
+
+    def _apply_drift(self, arr: np.ndarray, mask: np.ndarray, drift_multiplier: float, noise_level: float):
+        """Drift the masked cells of arr in place (see generate_drifted_sample)"""
+        if _drift_kernel is not None:
+            _drift_kernel(arr, self._std, mask, self._kind, float(drift_multiplier), float(noise_level))
+            return
+
+        sigma = self._std
+        noise = np.random.normal(0.0, 1.0, arr.shape) * (sigma * noise_level)
+
+        # PCA features: scale + shift by drift_multiplier sigmas
+        drifted = arr * drift_multiplier + drift_multiplier * sigma + noise
+        # Amount: scale + additive shift, kept non-negative
+        drifted[:, self._is_amount] = np.maximum(
+            0.0, arr[:, self._is_amount] * max(drift_multiplier, 2.0) + 1000.0 + noise[:, self._is_amount]
+        )
+        # Time: shift
+        drifted[:, self._is_time] = arr[:, self._is_time] + 20000.0 + noise[:, self._is_time]
+
+        np.copyto(arr, drifted, where=mask)
 
     def generate_drifted_sample(
         self,
@@ -39,42 +192,13 @@ class CreditCardDataGenerator:
         - For Amount: scale + additive shift (easy to detect)
         - Add noise proportional to std
         """
-        sample = self.generate_normal_sample()
-
-        # If user doesn't specify affected features, pick some PCA features (exclude Time, Amount by default)
-        if not affected_features:
-            candidates = [c for c in self.feature_columns if c not in ("Time", "Amount")]
-            # pick 5 PCA features
-            affected_features = list(np.random.choice(candidates, size=min(5, len(candidates)), replace=False))
-
-        # Always include Amount drift to make dataset drift detectable
-        if "Amount" in self.feature_columns and "Amount" not in affected_features:
-            affected_features = affected_features + ["Amount"]
-
-        for feat in affected_features:
-            base = float(sample[feat])
-            sigma = float(self.std.get(feat, 1.0))
-            noise = float(np.random.normal(0, sigma * noise_level))
-
-            if feat == "Amount":
-                # Make Amount drift very visible
-                # (scale + shift) then keep non-negative
-                val = base * max(drift_multiplier, 2.0) + 1000.0 + noise
-                val = max(0.0, val)
-
-            elif feat == "Time":
-                # Optional: shift time a bit (usually not necessary)
-                val = base + 20000.0 + noise
-
-            else:
-                # PCA features: scaling base might be too weak if base ~ 0,
-                # so also shift by a few sigmas.
-                # drift_multiplier=2.0 -> shift by 2*sigma, 4.0 -> 4*sigma, etc.
-                val = (base * drift_multiplier) + (drift_multiplier * sigma) + noise
-
-            sample[feat] = float(val)
-
-        return sample
+        arr = self.generate_normal_batch(1)
+        if affected_features:
+            mask = self._feature_mask(affected_features)[None, :]
+        else:
+            mask = self._random_mask(1, 0)
+        self._apply_drift(arr, mask, drift_multiplier, noise_level)
+        return dict(zip(self._cols, arr[0].tolist()))
 
 
     def generate_batch(self, n_samples: int = 100, scenario: str = "normal") -> List[Dict[str, float]]:
@@ -83,20 +207,11 @@ class CreditCardDataGenerator:
         noise_level = float(scen.get("noise_level", 0.05))
         affected_n = int(scen.get("affected_features", 0))
 
-        batch = []
-        for _ in range(n_samples):
-            if scenario == "normal":
-                batch.append(self.generate_normal_sample())
-            else:
-                features = None
-                if affected_n > 0:
-                    candidates = [c for c in self.feature_columns if c != "Time"]
-                    features = list(np.random.choice(candidates, size=affected_n, replace=False))
-                batch.append(
-                    self.generate_drifted_sample(
-                        drift_multiplier=drift_multiplier,
-                        affected_features=features,
-                        noise_level=noise_level,
-                    )
-                )
-        return batch
+        arr = self.generate_normal_batch(n_samples)
+
+        if scenario != "normal":
+            mask = self._random_mask(n_samples, affected_n)
+            self._apply_drift(arr, mask, drift_multiplier, noise_level)
+
+        cols = self._cols
+        return [dict(zip(cols, row)) for row in arr.tolist()]
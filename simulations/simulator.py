@@ -1,16 +1,28 @@
+import math
 import time
 import yaml
+import asyncio
 import logging
-import requests
+import httpx
 import numpy as np
+import orjson
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 from tqdm import tqdm
 
 from data_generator import CreditCardDataGenerator
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO: two lines per sample
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Concurrent requests in flight: enough to sustain rps at the expected latency
+MAX_CONCURRENCY = 64
+EXPECTED_LATENCY_S = 0.5
+
+# Response bodies kept per recorded error
+MAX_ERROR_CHARS = 256
 
 
 class PredictionSimulator:
@@ -25,59 +37,73 @@ class PredictionSimulator:
             "total": 0,
             "success": 0,
             "failed": 0,
-            "latency": [],
-            "predictions": [],
             "errors": [],
         }
 
+        # Per-request latency (s) and prediction, filled by index; grown per run
+        self._lat = np.empty(0, dtype=np.float32)
+        self._pred = np.empty(0, dtype=np.float32)
+        self._n_lat = 0
+        self._n_pred = 0
+
+        # Set per run by _dispatch (they belong to its event loop)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._pending: Set[asyncio.Task] = set()
+
     def check_api_health(self) -> bool:
         try:
-            r = requests.get(self.api["health_url"], timeout=5)
+            r = httpx.get(self.api["health_url"], timeout=5)
             return r.status_code == 200
         except Exception:
             return False
 
-    def send_prediction(self, features: Dict[str, float]) -> Optional[Dict]:
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run coro in the background; _dispatch waits for it before returning"""
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def send_prediction(self, features: Dict[str, float]) -> Optional[Dict]:
         # ✅ IMPORTANT: API expects features as DICT
         payload = {"features": features}
 
-        start = time.time()
         try:
-            r = requests.post(self.api["prediction_url"], json=payload, timeout=10)
-            latency = time.time() - start
+            async with self._limit:
+                start = time.time()
+                r = await self._client.post(self.api["prediction_url"], content=orjson.dumps(payload))
+                latency = time.time() - start
 
             self.stats["total"] += 1
-            self.stats["latency"].append(latency)
-
-            # if r.status_code == 200:
-            #     data = r.json()
-            #     pred = data.get("prediction")
-            #     self.stats["success"] += 1
-            #     self.stats["predictions"].append(pred)
-            #     return {"success": True, "prediction": pred}
+            self._lat[self._n_lat] = latency
+            self._n_lat += 1
 
             if r.status_code == 200:
                 data = r.json()
                 pred = data.get("prediction")
                 self.stats["success"] += 1
-                self.stats["predictions"].append(pred)
+                self._pred[self._n_pred] = np.nan if pred is None else pred
+                self._n_pred += 1
 
+                # Fire-and-forget: capture overlaps the next predictions
                 if "evidently_capture_url" in self.api and self.api["evidently_capture_url"]:
-                    self._capture_to_evidently(features, pred)
+                    self._spawn(self._capture_to_evidently(features, pred))
 
                 return {"success": True, "prediction": pred}
 
 
+            error = r.text[:MAX_ERROR_CHARS]
             self.stats["failed"] += 1
-            self.stats["errors"].append(r.text)
-            return {"success": False, "error": r.text}
+            self.stats["errors"].append(error)
+            return {"success": False, "error": error}
 
         except Exception as e:
             self.stats["failed"] += 1
             self.stats["errors"].append(str(e))
             return {"success": False, "error": str(e)}
 
-    def _capture_to_evidently(self, features: Dict[str, float], prediction: float) -> None:
+    async def _capture_to_evidently(self, features: Dict[str, float], prediction: float) -> None:
         """Send one prediction record to Evidently."""
         try:
             payload = {
@@ -86,42 +112,83 @@ class PredictionSimulator:
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "model_version": str(self.config.get("model", {}).get("version", "unknown")),
             }
-            r = requests.post(self.api["evidently_capture_url"], json=payload, timeout=10)
+            async with self._limit:
+                r = await self._client.post(self.api["evidently_capture_url"], content=orjson.dumps(payload))
 
             if r.status_code >= 300:
                 # log để biết fail vì gì (422/500…)
-                self.stats["errors"].append(f"capture_failed {r.status_code}: {r.text}")
-                logger.warning("[CAPTURE] failed %s %s", r.status_code, r.text[:200])
-            else:
-                logger.info("[CAPTURE] ok")
+                body = r.text[:MAX_ERROR_CHARS]
+                self.stats["errors"].append(f"capture_failed {r.status_code}: {body}")
+                logger.warning("[CAPTURE] failed %s %s", r.status_code, body[:200])
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[CAPTURE] ok")
         except Exception as e:
             self.stats["errors"].append(f"capture_exception: {e}")
             logger.warning("[CAPTURE] exception: %s", e)
 
+    def _reserve(self, n: int):
+        """Make room for n more latency/prediction entries"""
+        extra = np.empty(n, dtype=np.float32)
+        self._lat = np.concatenate((self._lat[:self._n_lat], extra))
+        self._pred = np.concatenate((self._pred[:self._n_pred], extra))
+
+    async def _dispatch(self, samples, rps: float):
+        """Send samples at a fixed rate with bounded concurrency"""
+        interval = 1.0 / rps
+        concurrency = min(MAX_CONCURRENCY, max(1, math.ceil(rps * EXPECTED_LATENCY_S * 2)))
+        self._limit = asyncio.Semaphore(concurrency)
+        self._pending = set()
+        loop = asyncio.get_running_loop()
+
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        # Bodies are pre-serialized with orjson (content=...), so set the type once
+        headers = {"Content-Type": "application/json"}
+        async with httpx.AsyncClient(limits=limits, timeout=10, headers=headers) as client:
+            self._client = client
+            with tqdm(total=len(samples), desc="Sending predictions") as pbar:
+                # Fixed-rate schedule: requests overlap instead of waiting on each other
+                next_send = loop.time()
+                for features in samples:
+                    wait = next_send - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    next_send += interval
+
+                    task = self._spawn(self.send_prediction(features))
+                    task.add_done_callback(lambda _: pbar.update())
+
+                # Predictions may still be spawning captures
+                while self._pending:
+                    await asyncio.gather(*self._pending)
+            self._client = None
 
     def run_simulation(self, n_requests: int = 100, scenario: str = "normal", rps: float = 2.0):
         if not self.check_api_health():
             logger.error("API not healthy")
             return
 
-        delay = 1.0 / rps
         samples = self.data_generator.generate_batch(n_requests, scenario)
-
-        for features in tqdm(samples, desc="Sending predictions"):
-            self.send_prediction(features)
-            time.sleep(delay)
+        self._reserve(len(samples))
+        asyncio.run(self._dispatch(samples, rps))
 
         self.summary()
 
     def summary(self):
-        logger.info("\n" + "=" * 60)
-        logger.info("Simulation Complete")
-        logger.info("=" * 60)
-        logger.info(f"Total Requests:      {self.stats['total']}")
-        logger.info(f"Successful:          {self.stats['success']}")
-        logger.info(f"Failed:              {self.stats['failed']}")
-        if self.stats["total"] > 0:
-            logger.info(f"Success Rate:        {self.stats['success'] / self.stats['total'] * 100:.2f}%")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n" + "=" * 60)
+            logger.info("Simulation Complete")
+            logger.info("=" * 60)
+            logger.info("Total Requests:      %d", self.stats["total"])
+            logger.info("Successful:          %d", self.stats["success"])
+            logger.info("Failed:              %d", self.stats["failed"])
+            if self.stats["total"] > 0:
+                logger.info("Success Rate:        %.2f%%", self.stats["success"] / self.stats["total"] * 100)
+
+            if self._n_lat:
+                p50, p95, p99 = np.percentile(self._lat[:self._n_lat], [50, 95, 99]) * 1000
+                logger.info("Latency p50/p95/p99: %.1f / %.1f / %.1f ms", p50, p95, p99)
+            if self._n_pred:
+                logger.info("Mean Prediction:     %.4f", np.nanmean(self._pred[:self._n_pred]))
 
         if self.stats["errors"]:
             logger.warning("\nErrors encountered: %d", len(self.stats["errors"]))